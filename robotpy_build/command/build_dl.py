@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from distutils.core import Command
 import os.path
 
@@ -12,6 +13,9 @@ class BuildDl(Command):
     ]
     wrappers = []
 
+    # maximum number of concurrent downloads
+    max_downloads = 8
+
     def initialize_options(self):
         self.build_base = None
         self.build_cache = None
@@ -22,5 +26,14 @@ class BuildDl(Command):
             self.build_cache = os.path.join(self.build_base, "cache")
 
     def run(self):
-        for wrapper in self.wrappers:
-            wrapper.on_build_dl(self.build_cache)
+        # all wrappers share a single pool so that downloads overlap
+        with ThreadPoolExecutor(max_workers=self.max_downloads) as executor:
+            pending = [
+                (wrapper, wrapper.download_futures(executor, self.build_cache))
+                for wrapper in self.wrappers
+            ]
+
+            for wrapper, futures in pending:
+                for future in futures:
+                    future.result()
+                wrapper.finish_build_dl()
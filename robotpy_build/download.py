@@ -3,37 +3,95 @@ import os
 from os.path import exists, join
 import posixpath
 import shutil
-import sys
 import tempfile
+import threading
 import zipfile
 
 
 from urllib.request import urlretrieve, urlcleanup
 
 
+# downloads may run concurrently, these make sure that each file is only
+# downloaded into the cache once by this process
+_cache_locks = {}
+_cache_locks_lock = threading.Lock()
+
+
+def _cache_lock(cache_fname):
+    with _cache_locks_lock:
+        return _cache_locks.setdefault(cache_fname, threading.Lock())
+
+
 def _download(url):
     """
         Downloads a file to a temporary directory
     """
 
+    # downloads may run concurrently, so no progress bar: it would be
+    # interleaved with the others
     print("Downloading", url)
-
-    def _reporthook(count, blocksize, totalsize):
-        percent = int(count * blocksize * 100 / totalsize)
-        sys.stdout.write("\r%02d%%" % percent)
-        sys.stdout.flush()
-
-    filename, _ = urlretrieve(url, reporthook=_reporthook)
+    filename, _ = urlretrieve(url)
     atexit.register(urlcleanup)
+    print("Downloaded", url)
     return filename
 
 
-def download_and_extract_zip(url, to=None, cache=None):
+def get_cache_filename(url, cache):
+    """
+        Returns the filename that url is stored at in the cache directory
+    """
+    return join(cache, posixpath.basename(url))
+
+
+def _copy_file(src, dst, buffer_size):
+    """
+        Copies a file, using os.sendfile to do the copy in the kernel where
+        it is supported
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            size = os.fstat(fsrc.fileno()).st_size
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            else:
+                return
+        except (AttributeError, OSError):
+            pass
+
+        # sendfile isn't available or failed, start over
+        fsrc.seek(0)
+        fdst.seek(0)
+        fdst.truncate()
+        shutil.copyfileobj(fsrc, fdst, buffer_size)
+
+
+def _copy_with_buffer(src, dst, buf):
+    view = memoryview(buf)
+    while True:
+        n = src.readinto(view)
+        if not n:
+            break
+        dst.write(view[:n])
+
+
+def _extract_member(z, src, dst, buf):
+    with z.open(src, "r") as zfp:
+        with open(dst, "wb") as fp:
+            _copy_with_buffer(zfp, fp, buf)
+
+
+def download_and_extract_zip(url, to=None, cache=None, buffer_size=1 << 20):
     """
         Utility method intended to be useful for downloading/extracting
         third party source zipfiles
 
         :param to: is either a string or a dict of {src: dst}
+        :param buffer_size: size of the buffer used to copy each file out
+                            of the zipfile when to is a dict
     """
 
     if to is None:
@@ -45,10 +103,22 @@ def download_and_extract_zip(url, to=None, cache=None):
     zip_fname = None
     if cache:
         os.makedirs(cache, exist_ok=True)
-        cache_fname = join(cache, posixpath.basename(url))
-        if not exists(cache_fname):
-            zip_fname = _download(url)
-            shutil.copy(zip_fname, cache_fname)
+        cache_fname = get_cache_filename(url, cache)
+        with _cache_lock(cache_fname):
+            if not exists(cache_fname):
+                zip_fname = _download(url)
+                # never leave a partial file in the cache. The temporary
+                # file is unique, other processes may share the cache
+                fd, tmp_fname = tempfile.mkstemp(
+                    dir=cache, prefix=posixpath.basename(url) + ".", suffix=".tmp"
+                )
+                os.close(fd)
+                try:
+                    _copy_file(zip_fname, tmp_fname, buffer_size)
+                    os.replace(tmp_fname, cache_fname)
+                except BaseException:
+                    os.unlink(tmp_fname)
+                    raise
         zip_fname = cache_fname
     else:
         zip_fname = _download(url)
@@ -58,7 +128,8 @@ def download_and_extract_zip(url, to=None, cache=None):
             z.extractall(to)
             return to
         else:
+            # a single buffer is reused for every file that is copied out,
+            # these are (large) libraries so it pays off
+            buf = bytearray(buffer_size)
             for src, dst in to.items():
-                with z.open(src, "r") as zfp:
-                    with open(dst, "wb") as fp:
-                        shutil.copyfileobj(zfp, fp)
+                _extract_member(z, src, dst, buf)
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pkg_resources import iter_entry_points
 import warnings
 
@@ -5,6 +6,8 @@ import warnings
 class PkgCfg:
     """
         Contains information about an installed package that uses robotpy-build
+
+        Results are cached, so callers must not modify returned lists
     """
 
     def __init__(self, entry_point):
@@ -14,16 +17,19 @@ class PkgCfg:
         # could deduce this, but this is probably fine
         self.import_name = getattr(self.module, "import_name", None)
 
+    @lru_cache(maxsize=None)
     def get_include_dirs(self):
         fn = getattr(self.module, "get_include_dirs", None)
         if fn:
             return fn()
 
+    @lru_cache(maxsize=None)
     def get_library_dirs(self):
         fn = getattr(self.module, "get_library_dirs", None)
         if fn:
             return fn()
 
+    @lru_cache(maxsize=None)
     def get_library_names(self):
         fn = getattr(self.module, "get_library_names", None)
         if fn:
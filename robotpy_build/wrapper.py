@@ -1,16 +1,293 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import filecmp
+import hashlib
 import inspect
+import json
+import multiprocessing
 import os
-from os.path import abspath, dirname, join, normpath, relpath, sep
+from os.path import abspath, dirname, exists, join, normpath, relpath, sep
 import shutil
+import sys
 import yaml
 
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
 from header2whatever.config import Config
-from header2whatever.parse import process_config
+from header2whatever.parse import ConfigProcessor
+from header2whatever.version import __version__ as _h2w_version
 
 from setuptools import Extension
 
+from . import hooks
 from .hooks_datacfg import HooksDataYaml
-from .download import download_and_extract_zip
+from .download import download_and_extract_zip, get_cache_filename
+
+_thisdir = abspath(dirname(__file__))
+_templates_dir = join(_thisdir, "templates")
+_cpp_tmpl = join(_templates_dir, "gen_pybind11.cpp.j2")
+
+try:
+    from .version import __version__ as _rpyb_version
+except ImportError:
+    _rpyb_version = None
+
+# header2whatever processor, created once per (worker) process so that the
+# hooks are only loaded and the template is only compiled once
+_processor = None
+
+_INIT_PY_TMPL = inspect.cleandoc(
+    """
+
+    # fmt: off
+    # This file is automatically generated, DO NOT EDIT
+
+    from os.path import abspath, join, dirname
+    _root = abspath(dirname(__file__))
+
+    ##IMPORTS##
+
+    from ctypes import cdll
+
+    ##LOADS##
+    """
+)
+
+_PKGCFG_PY_TMPL = inspect.cleandoc(
+    """
+    # fmt: off
+    # This file is automatically generated, DO NOT EDIT
+
+    from os.path import abspath, join, dirname
+    _root = abspath(dirname(__file__))
+
+    import_name = "##IMPORT_NAME##"
+
+    _include_dirs = [join(_root, "include")##EXTRAINCLUDES##]
+    _library_dirs = [join(_root, "lib")]
+
+    def get_include_dirs():
+        return list(_include_dirs)
+
+    def get_library_dirs():
+        return list(_library_dirs)
+
+    def get_library_names():
+        return ["##LIB_NAME##"]
+    """
+)
+
+_MODULE_HPP_TMPL = inspect.cleandoc(
+    """
+
+    // This file is autogenerated, DO NOT EDIT
+    #include <pybind11/pybind11.h>
+    namespace py = pybind11;
+
+    // forward declarations
+    ##DECLS##
+
+    static void initWrapper(py::module &m) {
+        using InitFn = void (*)(py::module &);
+        static constexpr InitFn inits[] = {
+    ##INITS##
+        };
+        for (auto init : inits) {
+            init(m);
+        }
+    }
+
+    """
+)
+
+# parsed generation_data files, keyed by (filename, mtime)
+_yaml_cache = {}
+
+# validated generation data, keyed by (filename, mtime)
+_hooks_data_cache = {}
+
+
+def _load_generation_data(datafile):
+    """
+        Loads a generation_data YAML file. Parsed results are cached in
+        memory and in a JSON sidecar file, which is much faster to load
+        than YAML on subsequent builds
+    """
+
+    mtime = os.path.getmtime(datafile)
+    key = (datafile, mtime)
+    try:
+        return _yaml_cache[key]
+    except KeyError:
+        pass
+
+    with open(datafile, "rb") as fp:
+        contents = fp.read()
+
+    # the sidecar records a hash of the YAML it was generated from, mtimes
+    # aren't reliable enough for this (files restored by cp -p, tar, etc)
+    digest = hashlib.sha256(contents).hexdigest()
+
+    cachefile = datafile + ".cache.json"
+    data = None
+    try:
+        with open(cachefile) as fp:
+            cached = json.load(fp)
+        if cached["sha256"] == digest:
+            data = cached["data"]
+    except (OSError, ValueError, TypeError, KeyError):
+        pass
+
+    if data is None:
+        data = yaml.load(contents, Loader=_SafeLoader)
+
+        # only write the sidecar if the data survives a JSON round trip
+        # (non-string keys and such don't), and write it atomically so a
+        # concurrent build never reads a partially written file
+        try:
+            encoded = json.dumps({"sha256": digest, "data": data})
+        except (TypeError, ValueError):
+            encoded = None
+
+        if encoded is not None and json.loads(encoded)["data"] == data:
+            tmpfile = f"{cachefile}.{os.getpid()}.tmp"
+            try:
+                with open(tmpfile, "w") as fp:
+                    fp.write(encoded)
+                os.replace(tmpfile, cachefile)
+            except OSError:
+                # not fatal, the YAML will just be parsed again next time
+                try:
+                    os.unlink(tmpfile)
+                except OSError:
+                    pass
+
+    _yaml_cache[key] = data
+    return data
+
+
+def _load_hooks_data(datafile):
+    """
+        Returns validated hooks data loaded from datafile (which may be
+        None). The result is shared, and must not be modified
+    """
+
+    key = None
+    if datafile:
+        key = (datafile, os.path.getmtime(datafile))
+
+    try:
+        return _hooks_data_cache[key]
+    except KeyError:
+        pass
+
+    data = {}
+    if datafile:
+        data = _load_generation_data(datafile)
+
+    data = HooksDataYaml(data)
+    data.validate()
+
+    _hooks_data_cache[key] = data
+    return data
+
+
+def _write_if_changed(fname, content):
+    """
+        Writes content to fname, unless it already contains exactly that.
+        Unchanged files keep their mtime, so dependent build steps don't
+        consider them dirty
+    """
+    try:
+        with open(fname) as fp:
+            if fp.read() == content:
+                return
+    except (OSError, UnicodeDecodeError):
+        pass
+
+    with open(fname, "w") as fp:
+        fp.write(content)
+
+
+def _replace_if_changed(src, dst):
+    """
+        Moves src to dst, unless dst already has the same content (in which
+        case src is removed)
+    """
+    try:
+        if filecmp.cmp(src, dst, shallow=False):
+            os.unlink(src)
+            return
+    except OSError:
+        pass
+
+    os.replace(src, dst)
+
+
+def _generator_files():
+    """
+        Returns the files in this package that can affect generated output:
+        all python sources and templates (pybind11 is only used to compile)
+    """
+    files = []
+    for dirpath, dirnames, filenames in os.walk(_thisdir):
+        dirnames[:] = sorted(
+            d for d in dirnames if d not in ("__pycache__", "pybind11")
+        )
+        for fname in sorted(filenames):
+            if fname.endswith((".py", ".j2")):
+                files.append(join(dirpath, fname))
+    return files
+
+
+def _can_fork_workers():
+    """
+        Worker processes must be forked: spawn/forkserver would re-run
+        setup.py (which has no __main__ guard) in every worker. Only Linux
+        is considered, forking is unsafe on macOS once system frameworks
+        have been loaded (which urlretrieve does)
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+
+    # ProcessPoolExecutor only accepts mp_context on Python 3.7+, before
+    # that it always uses the default start method
+    if sys.version_info < (3, 7):
+        return multiprocessing.get_start_method(allow_none=True) in (None, "fork")
+
+    return True
+
+
+def _generate_one(task):
+    """
+        Runs header2whatever on a single header. This is executed in a
+        worker process, so everything it needs is passed in as plain data
+    """
+
+    cfgd, incdir, datafile, dst, key = task
+
+    data = _load_hooks_data(datafile)
+
+    cfg = Config(cfgd)
+    cfg.validate()
+    cfg.root = incdir
+
+    global _processor
+    if _processor is None:
+        _processor = ConfigProcessor([_templates_dir], hooks)
+
+    _processor.process_config(cfg, data)
+
+    # the template is rendered to a temporary file
+    tmp_dst = cfgd["templates"][0]["dst"]
+    if exists(tmp_dst):
+        _replace_if_changed(tmp_dst, dst)
+
+    # record what the output was generated from
+    if key is not None and exists(dst):
+        _write_if_changed(f"{dst}.key", key)
 
 
 class Wrapper:
@@ -27,6 +304,12 @@ class Wrapper:
 
         self.setup_root = setup.root
         self.root = join(setup.root, *self.import_name.split("."))
+        self._incdir = join(self.root, "include")
+        self._libdir = join(self.root, "lib")
+        self._gensrcdir = join(self.root, "gensrc")
+        self._initpy = join(self.root, "__init__.py")
+        self._pkgcfgpy = join(self.root, "pkgcfg.py")
+        self._inc_stamp = join(self.root, ".dl-headers.stamp")
         self.cfg = wrapcfg
         self.platform = setup.platform
         self.pkgcfg = setup.pkgcfg
@@ -34,6 +317,10 @@ class Wrapper:
         if not self.cfg.artname:
             self.cfg.artname = self.cfg.name
 
+        self._cached_dep_pkgs = None
+        self._cached_libnames = None
+        self._cached_all_includes = None
+
         self.extension = None
         if self.cfg.sources or self.cfg.generate:
             # extensions just hold data about what to actually build, we can
@@ -62,102 +349,199 @@ class Wrapper:
         return f"{base}/{art}/{ver}/{art}-{ver}-{thing}.zip"
 
     def _extract_zip_to(self, thing, dst, cache):
-        download_and_extract_zip(self._dl_url(thing), to=dst, cache=cache)
+        download_and_extract_zip(
+            self._dl_url(thing), to=dst, cache=cache, buffer_size=1 << 20
+        )
 
     # pkgcfg interface
     def get_include_dirs(self):
-        return [join(self.root, "include")]
+        return [self._incdir]
 
     def get_library_dirs(self):
-        return [join(self.root, "lib")]
+        return [self._libdir]
 
     def get_library_names(self):
         return [self.cfg.name]
 
+    def _dep_pkgs(self):
+        """
+            Returns this wrapper followed by its direct dependencies, each
+            looked up only once
+        """
+        if self._cached_dep_pkgs is None:
+            self._cached_dep_pkgs = [self] + [
+                self.pkgcfg.get_pkg(dep) for dep in dict.fromkeys(self.cfg.depends)
+            ]
+        return self._cached_dep_pkgs
+
     def _all_includes(self, include_rpyb):
-        includes = self.get_include_dirs()
-        for dep in self.cfg.depends:
-            includes.extend(self.pkgcfg.get_pkg(dep).get_include_dirs())
+        if self._cached_all_includes is None:
+            includes = []
+            for pkg in self._dep_pkgs():
+                for d in pkg.get_include_dirs() or []:
+                    if d not in includes:
+                        includes.append(d)
+            self._cached_all_includes = includes
+
+        includes = self._cached_all_includes[:]
         if include_rpyb:
             includes.extend(self.pkgcfg.get_pkg("robotpy-build").get_include_dirs())
         return includes
 
     def _all_library_dirs(self):
-        libs = self.get_library_dirs()
-        for dep in self.cfg.depends:
-            libs.extend(self.pkgcfg.get_pkg(dep).get_library_dirs())
+        libs = []
+        for pkg in self._dep_pkgs():
+            libs.extend(pkg.get_library_dirs() or [])
         return libs
 
     def _all_library_names(self):
-        libs = self.get_library_names()
-        for dep in self.cfg.depends:
-            libs.extend(self.pkgcfg.get_pkg(dep).get_library_names())
+        libs = []
+        for pkg in self._dep_pkgs():
+            libs.extend(pkg.get_library_names() or [])
         return list(reversed(libs))
 
-    def on_build_dl(self, cache):
+    def _libnames(self):
+        if self._cached_libnames is None:
+            libnames = self.cfg.libs
+            if not libnames:
+                libnames = [self.cfg.name]
+
+            prefix = self.platform.libprefix
+            libext = self.cfg.libexts.get(self.platform.libext, self.platform.libext)
+
+            self._cached_libnames = [f"{prefix}{lib}{libext}" for lib in libnames]
 
-        libdir = join(self.root, "lib")
-        incdir = join(self.root, "include")
-        initpy = join(self.root, "__init__.py")
-        pkgcfgpy = join(self.root, "pkgcfg.py")
+        return self._cached_libnames
 
-        # Remove downloaded/generated artifacts first
-        shutil.rmtree(libdir, ignore_errors=True)
-        shutil.rmtree(incdir, ignore_errors=True)
+    def _dl_stamp(self, thing, cache, extra=""):
+        """
+            Identifies the cached download of thing, or None if it is not
+            in the cache yet
+        """
+        if not cache:
+            return None
 
+        url = self._dl_url(thing)
         try:
-            os.unlink(initpy)
+            mtime = os.path.getmtime(get_cache_filename(url, cache))
         except OSError:
-            pass
+            return None
+
+        return hashlib.sha256(f"{url}\n{mtime}\n{extra}".encode()).hexdigest()
+
+    def _dl_is_current(self, thing, cache, stampfile, extra=""):
+        stamp = self._dl_stamp(thing, cache, extra)
+        if stamp is None:
+            return False
         try:
-            os.unlink(pkgcfgpy)
+            with open(stampfile) as fp:
+                return fp.read() == stamp
         except OSError:
-            pass
+            return False
 
-        self._extract_zip_to("headers", incdir, cache)
+    def _extract_zip_stamped(self, thing, dst, cache, stampfile, extra=""):
+        self._extract_zip_to(thing, dst, cache)
 
-        libnames = self.cfg.libs
-        if not libnames:
-            libnames = [self.cfg.name]
+        stamp = self._dl_stamp(thing, cache, extra)
+        if stamp is not None:
+            tmpfile = f"{stampfile}.tmp"
+            with open(tmpfile, "w") as fp:
+                fp.write(stamp)
+            os.replace(tmpfile, stampfile)
 
-        libext = self.cfg.libexts.get(self.platform.libext, self.platform.libext)
+    def download_futures(self, executor, cache):
+        """
+            Removes stale downloaded artifacts and schedules the downloads
+            for this wrapper on executor. Returns a list of futures that
+            must complete before :meth:`finish_build_dl` is called
 
-        libnames = [f"{self.platform.libprefix}{lib}{libext}" for lib in libnames]
+            Artifacts that were already extracted from an unchanged cached
+            zipfile are left alone
+        """
 
-        os.makedirs(libdir)
-        to = {
-            join(self.platform.os, self.platform.arch, "shared", libname): join(
-                libdir, libname
+        libdir = self._libdir
+        incdir = self._incdir
+
+        futures = []
+
+        inc_stamp = self._inc_stamp
+        if not (
+            os.path.isdir(incdir)
+            and self._dl_is_current("headers", cache, inc_stamp)
+        ):
+            if os.path.lexists(inc_stamp):
+                os.unlink(inc_stamp)
+            shutil.rmtree(incdir, ignore_errors=True)
+            futures.append(
+                executor.submit(
+                    self._extract_zip_stamped, "headers", incdir, cache, inc_stamp
+                )
             )
-            for libname in libnames
-        }
-
-        self._extract_zip_to(f"{self.platform.os}{self.platform.arch}", to, cache)
-
-        self._write_init_py(initpy, libnames)
-        self._write_pkgcfg_py(pkgcfgpy)
 
-    def _write_init_py(self, fname, libnames):
-        init = inspect.cleandoc(
-            """
+        # zipfile member names always use forward slashes
+        shared_dir = f"{self.platform.os}/{self.platform.arch}/shared"
+        to = {
+            f"{shared_dir}/{libname}": join(libdir, libname)
+            for libname in self._libnames()
+        }
 
-        # fmt: off
-        # This file is automatically generated, DO NOT EDIT
+        # the stamp covers the set of libraries extracted too
+        libthing = f"{self.platform.os}{self.platform.arch}"
+        lib_stamp = join(self.root, ".dl-libs.stamp")
+        lib_extra = repr(sorted(to.items()))
+        if not (
+            os.path.isdir(libdir)
+            and self._dl_is_current(libthing, cache, lib_stamp, lib_extra)
+        ):
+            if os.path.lexists(lib_stamp):
+                os.unlink(lib_stamp)
+            shutil.rmtree(libdir, ignore_errors=True)
+            os.makedirs(libdir)
+            futures.append(
+                executor.submit(
+                    self._extract_zip_stamped,
+                    libthing,
+                    to,
+                    cache,
+                    lib_stamp,
+                    lib_extra,
+                )
+            )
 
-        from os.path import abspath, join, dirname
-        _root = abspath(dirname(__file__))
+        return futures
 
-        ##IMPORTS##
+    def finish_build_dl(self):
+        """
+            Writes files that depend on the downloaded artifacts
+        """
+        self._write_init_py(self._initpy, self._libnames())
+        self._write_pkgcfg_py(self._pkgcfgpy)
 
-        from ctypes import cdll
+    def on_build_dl(self, cache):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = self.download_futures(executor, cache)
 
-        """
-        )
+        # propagates any download errors
+        for future in futures:
+            future.result()
 
-        init += "\n"
+        self.finish_build_dl()
 
-        for libname in libnames:
-            init += f'_lib = cdll.LoadLibrary(join(_root, "lib", "{libname}"))\n'
+    def _write_init_py(self, fname, libnames):
+        loads = []
+        if self.platform.os == "windows":
+            # lets the loader find dependencies of the libraries next to them
+            loads += [
+                "import os",
+                'if hasattr(os, "add_dll_directory"):',
+                '    _dll_dir = os.add_dll_directory(join(_root, "lib"))',
+                "",
+            ]
+
+        loads += [
+            f"for _lib in {tuple(libnames)!r}:",
+            '    cdll.LoadLibrary(join(_root, "lib", _lib))',
+        ]
 
         imports = []
         for dep in self.cfg.depends:
@@ -170,35 +554,14 @@ class Wrapper:
         else:
             imports = ""
 
-        init = init.replace("##IMPORTS##", imports)
+        init = _INIT_PY_TMPL.replace("##IMPORTS##", imports).replace(
+            "##LOADS##", "\n".join(loads) + "\n"
+        )
 
-        with open(join(self.root, "__init__.py"), "w") as fp:
-            fp.write(init)
+        _write_if_changed(fname, init)
 
     def _write_pkgcfg_py(self, fname):
 
-        # write pkgcfg.py
-        pkgcfg = inspect.cleandoc(
-            f"""
-        # fmt: off
-        # This file is automatically generated, DO NOT EDIT
-
-        from os.path import abspath, join, dirname
-        _root = abspath(dirname(__file__))
-
-        import_name = "{self.import_name}"
-
-        def get_include_dirs():
-            return [join(_root, "include")##EXTRAINCLUDES##]
-
-        def get_library_dirs():
-            return [join(_root, "lib")]
-        
-        def get_library_names():
-            return ["{self.cfg.name}"]
-        """
-        )
-
         extraincludes = ""
         if self.cfg.extra_headers:
             # these are relative to the root of the project, need
@@ -209,61 +572,116 @@ class Wrapper:
                 h = '", "'.join(relpath(normpath(h), pth).split(sep))
                 extraincludes += f', join(_root, "{h}")'
 
-        pkgcfg = pkgcfg.replace("##EXTRAINCLUDES##", extraincludes)
+        pkgcfg = (
+            _PKGCFG_PY_TMPL.replace("##IMPORT_NAME##", self.import_name)
+            .replace("##LIB_NAME##", self.cfg.name)
+            .replace("##EXTRAINCLUDES##", extraincludes)
+        )
 
-        with open(fname, "w") as fp:
-            fp.write(pkgcfg)
+        _write_if_changed(fname, pkgcfg)
 
     def on_build_gen(self):
 
         if not self.cfg.generate:
             return
 
-        thisdir = abspath(dirname(__file__))
+        incdir = self._incdir
+        outdir = self._gensrcdir
 
-        incdir = join(self.root, "include")
-        outdir = join(self.root, "gensrc")
-        hooks = join(thisdir, "hooks.py")
-        cpp_tmpl = join(thisdir, "templates", "gen_pybind11.cpp.j2")
-
-        pp_includes = self._all_includes(False)
+        # normalized once here and shared by every header's configuration
+        pp_includes = tuple(
+            dict.fromkeys(abspath(p) for p in self._all_includes(False))
+        )
 
-        shutil.rmtree(outdir, ignore_errors=True)
-        os.makedirs(outdir)
+        os.makedirs(outdir, exist_ok=True)
 
-        data = {}
+        datafile = None
         if self.cfg.generation_data:
             datafile = join(self.setup_root, normpath(self.cfg.generation_data))
 
-            with open(datafile) as fp:
-                data = yaml.safe_load(fp)
-
-        data = HooksDataYaml(data)
-        data.validate()
+        # validate here so that errors are reported before any work starts
+        _load_hooks_data(datafile)
+
+        # inputs that affect the output of every header
+        input_files = _generator_files() + [datafile, self._inc_stamp]
+
+        # dependencies can be upgraded in place without their include paths
+        # changing, so fingerprint them too
+        for pkg in self._dep_pkgs()[1:]:
+            if isinstance(pkg, Wrapper):
+                input_files.append(pkg._inc_stamp)
+            else:
+                input_files.append(getattr(pkg.module, "__file__", None))
+
+        common_inputs = [
+            f"robotpy-build:{_rpyb_version}",
+            f"header2whatever:{_h2w_version}",
+        ]
+        for fname in input_files:
+            if fname and exists(fname):
+                common_inputs.append(f"{fname}:{os.path.getmtime(fname)}")
+        common_inputs = "\n".join(common_inputs).encode()
 
         sources = self.cfg.sources[:]
+        tasks = []
+        outputs = {"module.hpp"}
+
+        incdir_sep = incdir + sep
+        outdir_sep = outdir + sep
 
         for gen in self.cfg.generate:
             for name, header in gen.items():
 
-                dst = join(outdir, f"{name}.cpp")
+                dst = f"{outdir_sep}{name}.cpp"
                 sources.append(dst)
+                outputs.add(f"{name}.cpp")
 
                 # for each thing, create a h2w configuration dictionary
                 cfgd = {
-                    "headers": [join(incdir, normpath(header))],
-                    "templates": [{"src": cpp_tmpl, "dst": dst}],
-                    "hooks": hooks,
+                    "headers": [incdir_sep + normpath(header)],
+                    "templates": [{"src": _cpp_tmpl, "dst": f"{dst}.tmp"}],
                     "preprocess": True,
                     "pp_include_paths": pp_includes,
                     "vars": {"mod_fn": name},
                 }
 
-                cfg = Config(cfgd)
-                cfg.validate()
-                cfg.root = incdir
-
-                process_config(cfg, data)
+                outputs.add(f"{name}.cpp.key")
+
+                # skip headers whose output would be the same as last time
+                key = self._gen_key(cfgd, common_inputs)
+                if key is not None and exists(dst):
+                    try:
+                        with open(f"{dst}.key") as fp:
+                            if fp.read() == key:
+                                continue
+                    except OSError:
+                        pass
+
+                tasks.append((cfgd, incdir, datafile, dst, key))
+
+        # outputs are only rewritten when they change, so instead of
+        # starting from an empty directory remove anything stale
+        for fname in os.listdir(outdir):
+            if fname not in outputs:
+                fname = join(outdir, fname)
+                if os.path.isdir(fname):
+                    shutil.rmtree(fname)
+                else:
+                    os.unlink(fname)
+
+        # each header is processed independently, so spread them out
+        if len(tasks) > 1 and _can_fork_workers():
+            kwargs = {}
+            if sys.version_info >= (3, 7):
+                kwargs["mp_context"] = multiprocessing.get_context("fork")
+
+            with ProcessPoolExecutor(
+                max_workers=min(len(tasks), os.cpu_count() or 1), **kwargs
+            ) as ex:
+                list(ex.map(_generate_one, tasks))
+        else:
+            for task in tasks:
+                _generate_one(task)
 
         # generate an inline file that can be included + called
         self._write_module_inl(outdir)
@@ -274,36 +692,34 @@ class Wrapper:
         self.extension.library_dirs = self._all_library_dirs()
         self.extension.libraries = self._all_library_names()
 
-    def _write_module_inl(self, outdir):
-
-        decls = []
-        calls = []
+    def _gen_key(self, cfgd, common_inputs):
+        """
+            Returns a hash of everything that the output for a header
+            configuration depends on, or None if it can't be determined
+        """
+        h = hashlib.sha1()
+        try:
+            with open(cfgd["headers"][0], "rb") as fp:
+                h.update(fp.read())
+        except OSError:
+            return None
 
-        for gen in self.cfg.generate:
-            for name, header in gen.items():
-                decls.append(f"void init_{name}(py::module &m);")
-                calls.append(f"    init_{name}(m);")
+        h.update(common_inputs)
+        h.update(repr(cfgd).encode())
+        return h.hexdigest()
 
-        content = (
-            inspect.cleandoc(
-                """
+    def _write_module_inl(self, outdir):
 
-        // This file is autogenerated, DO NOT EDIT
-        #include <pybind11/pybind11.h>
-        namespace py = pybind11;
+        # each init function is only declared and called once
+        names = list(
+            dict.fromkeys(name for gen in self.cfg.generate for name in gen.keys())
+        )
 
-        // forward declarations
-        ##DECLS##
+        decls = [f"void init_{name}(py::module &m);" for name in names]
+        inits = [f"        init_{name}," for name in names]
 
-        static void initWrapper(py::module &m) {
-        ##CALLS##
-        }
-        
-        """
-            )
-            .replace("##DECLS##", "\n".join(decls))
-            .replace("##CALLS##", "\n".join(calls))
+        content = _MODULE_HPP_TMPL.replace("##DECLS##", "\n".join(decls)).replace(
+            "##INITS##", "\n".join(inits)
         )
 
-        with open(join(outdir, "module.hpp"), "w") as fp:
-            fp.write(content)
+        _write_if_changed(join(outdir, "module.hpp"), content)
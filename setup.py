@@ -63,7 +63,7 @@ setup(
     include_package_data=True,
     install_requires=[
         "setuptools",
-        "header2whatever",
+        "header2whatever>=0.3.0",
         "sphinxify",
         "schematics",
         "toml",